@@ -0,0 +1,32 @@
+"""Add content hash and simhash fingerprints to document chunks
+
+Revision ID: 3c1d7e2a9b40
+Revises: 9fce9952714f
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1d7e2a9b40'
+down_revision: Union[str, Sequence[str], None] = '9fce9952714f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_chunks', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.add_column('document_chunks', sa.Column('simhash', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_document_chunks_content_hash'), 'document_chunks', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_document_chunks_content_hash'), table_name='document_chunks')
+    op.drop_column('document_chunks', 'simhash')
+    op.drop_column('document_chunks', 'content_hash')
@@ -0,0 +1,57 @@
+"""Add halfvec and binary-quantized embedding columns
+
+Revision ID: 5e8a4f17c2d6
+Revises: 3c1d7e2a9b40
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+import pgvector
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e8a4f17c2d6'
+down_revision: Union[str, Sequence[str], None] = '3c1d7e2a9b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # halfvec / bit columns and binary_quantize() need pgvector >= 0.7
+    op.add_column('document_chunks', sa.Column('embedding_half', pgvector.sqlalchemy.HALFVEC(dim=384), nullable=True))
+    op.add_column('document_chunks', sa.Column('embedding_bits', pgvector.sqlalchemy.BIT(length=384), nullable=True))
+
+    # Convert existing rows; the float32 column is kept until compacted with
+    # knowledge_base/scripts/quantize_embeddings.py --drop-float
+    op.execute(
+        "UPDATE document_chunks "
+        "SET embedding_half = embedding::halfvec(384), "
+        "embedding_bits = binary_quantize(embedding)::bit(384) "
+        "WHERE embedding IS NOT NULL"
+    )
+
+    op.create_index(
+        'ix_document_chunks_embedding_half', 'document_chunks', ['embedding_half'], unique=False,
+        postgresql_using='hnsw', postgresql_ops={'embedding_half': 'halfvec_cosine_ops'}
+    )
+    op.create_index(
+        'ix_document_chunks_embedding_bits', 'document_chunks', ['embedding_bits'], unique=False,
+        postgresql_using='hnsw', postgresql_ops={'embedding_bits': 'bit_hamming_ops'}
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Restore float32 vectors for rows that were compacted
+    op.execute(
+        "UPDATE document_chunks SET embedding = embedding_half::vector(384) "
+        "WHERE embedding IS NULL AND embedding_half IS NOT NULL"
+    )
+    op.drop_index('ix_document_chunks_embedding_bits', table_name='document_chunks', postgresql_using='hnsw')
+    op.drop_index('ix_document_chunks_embedding_half', table_name='document_chunks', postgresql_using='hnsw')
+    op.drop_column('document_chunks', 'embedding_bits')
+    op.drop_column('document_chunks', 'embedding_half')
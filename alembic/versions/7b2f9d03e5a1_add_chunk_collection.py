@@ -0,0 +1,61 @@
+"""Denormalize vector collection onto document chunks with per-collection ANN indexes
+
+Revision ID: 7b2f9d03e5a1
+Revises: 5e8a4f17c2d6
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2f9d03e5a1'
+down_revision: Union[str, Sequence[str], None] = '5e8a4f17c2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLLECTION_INDEXES = (
+    ("embedding", "vector_cosine_ops"),
+    ("embedding_half", "halfvec_cosine_ops"),
+    ("embedding_bits", "bit_hamming_ops"),
+)
+
+
+def _collections():
+    rows = op.get_bind().execute(sa.text("SELECT DISTINCT collection FROM document_chunks")).scalars()
+    # Longer names would be truncated past the 63-character index name limit
+    return [name for name in rows if re.match(r"^[a-z0-9_]{1,29}$", name)]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('document_chunks', sa.Column(
+        'collection', sa.String(length=100), nullable=False, server_default='bitcoin_docs'
+    ))
+    op.execute(
+        "UPDATE document_chunks SET collection = documents.vector_collection "
+        "FROM documents WHERE documents.id = document_chunks.document_id"
+    )
+    op.create_index(op.f('ix_document_chunks_collection'), 'document_chunks', ['collection'], unique=False)
+
+    # Partial ANN index per collection so scoped queries only walk their own graph
+    for collection in _collections():
+        for column, opclass in COLLECTION_INDEXES:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_document_chunks_{column}_{collection} "
+                f"ON document_chunks USING hnsw ({column} {opclass}) "
+                f"WHERE collection = '{collection}'"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for collection in _collections():
+        for column, _ in COLLECTION_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS ix_document_chunks_{column}_{collection}")
+    op.drop_index(op.f('ix_document_chunks_collection'), table_name='document_chunks')
+    op.drop_column('document_chunks', 'collection')
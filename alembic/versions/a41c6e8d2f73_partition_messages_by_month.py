@@ -0,0 +1,109 @@
+"""Range-partition messages by month and track archived conversations
+
+Revision ID: a41c6e8d2f73
+Revises: 7b2f9d03e5a1
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6e8d2f73'
+down_revision: Union[str, Sequence[str], None] = '7b2f9d03e5a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _month(day: date, offset: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('archived_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('conversations', sa.Column('archive_path', sa.String(length=500), nullable=True))
+    op.add_column('conversations', sa.Column(
+        'archived_message_count', sa.Integer(), nullable=False, server_default='0'
+    ))
+
+    # Swap the plain table for a partitioned one, keeping the id sequence
+    op.drop_index('ix_messages_id', table_name='messages')
+    op.drop_index('ix_messages_conversation_id', table_name='messages')
+    op.rename_table('messages', 'messages_unpartitioned')
+    op.execute("ALTER TABLE messages_unpartitioned RENAME CONSTRAINT messages_pkey TO messages_unpartitioned_pkey")
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            conversation_id INTEGER NOT NULL REFERENCES conversations (id),
+            role messagerole NOT NULL,
+            content TEXT NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM messages_unpartitioned")).scalar()
+    first = _month(oldest.date() if oldest else date.today())
+    last = _month(date.today(), MONTHS_AHEAD)
+    month = first
+    while month <= last:
+        upper = _month(month, 1)
+        op.execute(
+            f"CREATE TABLE messages_y{month.year}m{month.month:02d} PARTITION OF messages "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    op.execute(
+        "INSERT INTO messages (id, created_at, conversation_id, role, content, updated_at) "
+        "SELECT id, created_at, conversation_id, role, content, updated_at FROM messages_unpartitioned"
+    )
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.drop_table('messages_unpartitioned')
+
+    op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+    op.create_index(
+        'ix_messages_conversation_id_created_at', 'messages', ['conversation_id', 'created_at'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Archived messages stay in their archive files; only hot rows are moved back
+    op.drop_index('ix_messages_conversation_id_created_at', table_name='messages')
+    op.drop_index(op.f('ix_messages_id'), table_name='messages')
+    op.rename_table('messages', 'messages_partitioned')
+    op.execute("ALTER TABLE messages_partitioned RENAME CONSTRAINT messages_pkey TO messages_partitioned_pkey")
+    op.execute("""
+        CREATE TABLE messages (
+            id INTEGER NOT NULL DEFAULT nextval('messages_id_seq'),
+            conversation_id INTEGER NOT NULL REFERENCES conversations (id),
+            role messagerole NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT messages_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(
+        "INSERT INTO messages (id, conversation_id, role, content, created_at, updated_at) "
+        "SELECT id, conversation_id, role, content, created_at, updated_at FROM messages_partitioned"
+    )
+    op.execute("ALTER SEQUENCE messages_id_seq OWNED BY messages.id")
+    op.drop_table('messages_partitioned')  # drops every partition with it
+    op.create_index(op.f('ix_messages_conversation_id'), 'messages', ['conversation_id'], unique=False)
+    op.create_index(op.f('ix_messages_id'), 'messages', ['id'], unique=False)
+
+    op.drop_column('conversations', 'archived_message_count')
+    op.drop_column('conversations', 'archive_path')
+    op.drop_column('conversations', 'archived_at')
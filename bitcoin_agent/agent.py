@@ -2,13 +2,17 @@ from together import Together
 from bitcoin_agent.config import settings
 from bitcoin_agent.crypto import get_crypto_price
 from bitcoin_agent.services.redis_service import redis_service
-from bitcoin_agent.services.vector_service import vector_service
+from bitcoin_agent.services.rerank_service import rerank_service
+from bitcoin_agent.services.context_service import context_packer, context_token_budget
 from bitcoin_agent.services.conversation_service import add_message
 from bitcoin_agent.models.message import MessageRole
 from sqlalchemy.orm import Session
+from typing import Optional
 
 client = Together(api_key=settings.TOGETHER_API_KEY)
 
+MAX_COMPLETION_TOKENS = 150
+
 crypto_price_tool = [{
     "type": "function",
     "function": {
@@ -23,17 +27,39 @@ def build_system_prompt(context: str = "") -> str:
         2. Bitcoin knowledge base
         Provide accurate, helpful information about Bitcoin."""
     if context:
-        base_prompt += f"\n"
+        base_prompt += (
+            "\n\nAnswer using the following excerpts from the knowledge base when they are relevant."
+            f"\n\nContext:\n{context}"
+        )
     return base_prompt
 
-def process_user_input(user_input: str, db: Session, conversation_id: int, use_rag: bool = True) -> str:
-    """Process user input with database persistence and RAG"""
+def needs_rag(user_input: str) -> bool:
+    return any(kw in user_input.lower() for kw in ["bitcoin", "btc", "whitepaper", "blockchain"])
+
+def build_rag_context(results) -> str:
+    return context_packer.pack(results, context_token_budget(MAX_COMPLETION_TOKENS))
+
+def process_user_input(
+    user_input: str,
+    db: Session,
+    conversation_id: int,
+    use_rag: bool = True,
+    collection: Optional[str] = None,
+    rag_context: Optional[str] = None,
+) -> str:
+    """Process user input with database persistence and RAG, optionally scoped to one collection.
+
+    Callers that already retrieved context (e.g. batch jobs) pass it as ``rag_context``.
+    """
     
     add_message(db, conversation_id, MessageRole.USER, user_input)
     
-    rag_context = ""
-    if use_rag and any(kw in user_input.lower() for kw in ["bitcoin", "btc", "whitepaper", "blockchain"]):
-        rag_context = vector_service.search_similar(db, user_input)
+    if rag_context is None:
+        rag_context = ""
+        if use_rag and needs_rag(user_input):
+            # Only chunks that pass the reranker's relevance cutoff reach the prompt
+            results = rerank_service.retrieve(db, user_input, collection=collection)
+            rag_context = build_rag_context(results)
 
     messages = [
         {"role": "system", "content": build_system_prompt(rag_context)},
@@ -43,7 +69,7 @@ def process_user_input(user_input: str, db: Session, conversation_id: int, use_r
     response = client.chat.completions.create(
         model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
         messages=messages,
-        max_tokens=150,
+        max_tokens=MAX_COMPLETION_TOKENS,
         temperature=0.7,
         tools=crypto_price_tool
     )
@@ -65,7 +91,7 @@ def process_user_input(user_input: str, db: Session, conversation_id: int, use_r
         response = client.chat.completions.create(
             model="meta-llama/Meta-Llama-3.1-8B-Instruct-Turbo",
             messages=messages,
-            max_tokens=150,
+            max_tokens=MAX_COMPLETION_TOKENS,
             temperature=0.7
         )
     
@@ -1,21 +1,26 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
+import json
 from datetime import datetime
 
-from bitcoin_agent.db.session import get_db, enable_pgvector
+from bitcoin_agent.db.session import get_db, enable_pgvector, ensure_partitions
 from bitcoin_agent.services.auth_service import create_access_token, authenticate_user, get_current_user
 from bitcoin_agent.services.user_service import create_user
 from bitcoin_agent.services.conversation_service import (
     create_conversation, get_user_conversations, get_conversation, 
     get_conversation_history
 )
-from bitcoin_agent.services.vector_service import vector_service
+from bitcoin_agent.services.rerank_service import rerank_service
+from bitcoin_agent.config import settings
 from bitcoin_agent.agent import process_user_input
+from bitcoin_agent.services.batch_service import parse_prompt_line, run_batch, start_job
 from bitcoin_agent.models.user import User
+from bitcoin_agent.api.rate_limit import RateLimitMiddleware, metrics_snapshot
 
 app = FastAPI(title="Bitcoin AI Agent API", version="1.0.0")
 
@@ -25,11 +30,14 @@ async def startup_event():
     try:
         # Enable pgvector extension
         enable_pgvector()
+        ensure_partitions()
         print("✓ Application startup complete")
     except Exception as e:
         print(f"⚠ Warning: Could not initialize database: {e}")
         print("⚠ The app will continue, but database features may not work")
 
+# Added first so CORS headers also wrap 429/503 responses
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins = ["*"],
@@ -56,11 +64,18 @@ class TokenResponse(BaseModel):
 class ChatRequest(BaseModel):
     message: str
     conversation_id: Optional[int] = None
+    collection: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     conversation_id: int
 
+class BatchChatRequest(BaseModel):
+    prompts: List[str]
+    job_id: Optional[str] = None
+    concurrency: int = settings.BATCH_CONCURRENCY
+    collection: Optional[str] = None
+
 class PredictionRequest(BaseModel):
     crypto: str = "bitcoin"
     horizon_hours: int = 24
@@ -135,10 +150,44 @@ async def chat(
         conversation_id = request.conversation_id
     
     # Process user input with RAG
-    response = process_user_input(request.message, db, conversation_id)
+    response = process_user_input(request.message, db, conversation_id, collection=request.collection)
     
     return ChatResponse(response=response, conversation_id=conversation_id)
 
+@app.post("/chat/batch")
+async def chat_batch(
+    request: Request,
+    job_id: Optional[str] = None,
+    concurrency: int = settings.BATCH_CONCURRENCY,
+    collection: Optional[str] = None,
+    current_user: User = Depends(get_current_user_dependency)
+):
+    """Run many prompts through the chat pipeline, streaming NDJSON results as they complete.
+
+    Accepts a JSON body (BatchChatRequest) or an application/x-ndjson body with one prompt
+    per line (options then come from the query string). Pass a previous ``job_id`` to resume.
+    """
+    body = await request.body()
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        prompts = [prompt for prompt in map(parse_prompt_line, body.decode("utf-8").splitlines()) if prompt]
+    else:
+        try:
+            batch = BatchChatRequest.model_validate_json(body)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        prompts, job_id, concurrency, collection = batch.prompts, batch.job_id, batch.concurrency, batch.collection
+
+    try:
+        job_id, _ = start_job(current_user.id, job_id)
+    except PermissionError:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+
+    results = (
+        json.dumps(result, ensure_ascii=False) + "\n"
+        for result in run_batch(prompts, current_user.id, job_id, concurrency, collection)
+    )
+    return StreamingResponse(results, media_type="application/x-ndjson", headers={"X-Batch-Job-Id": job_id})
+
 @app.get("/conversations")
 async def get_conversations(
     current_user: User = Depends(get_current_user_dependency),
@@ -151,7 +200,7 @@ async def get_conversations(
             "id": conv.id,
             "title": conv.title,
             "created_at": conv.created_at,
-            "message_count": len(conv.messages)
+            "message_count": len(conv.messages) + conv.archived_message_count
         }
         for conv in conversations
     ]
@@ -183,18 +232,25 @@ async def get_messages(
 async def search_documents(
     query: str,
     limit: int = 5,
+    candidates: int = settings.RERANK_CANDIDATES,
+    min_score: float = settings.RERANK_MIN_SCORE,
+    collection: Optional[str] = None,
     current_user: User = Depends(get_current_user_dependency),
     db: Session = Depends(get_db)
 ):
-    """Search documents using RAG"""
-    chunks = vector_service.search_similar(db, query, limit)
+    """Search documents using RAG (vector candidates reranked by a cross-encoder)"""
+    results = rerank_service.retrieve(db, query, limit, candidates, min_score, collection)
     return [
         {
-            "content": chunk,
-            "document_title": chunk.document.title,
-            "similarity_score": "N/A"
+            "chunk_id": result.chunk.id,
+            "content": result.chunk.content,
+            "document_title": result.chunk.document.title,
+            "collection": result.chunk.collection,
+            "chunk_index": result.chunk.chunk_index,
+            "similarity_score": round(result.similarity, 4),
+            "rerank_score": round(result.rerank_score, 4)
         }
-        for chunk in chunks
+        for result in results
     ]
 
 # Health Check
@@ -203,6 +259,11 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Admission-control counters, in-flight requests and recent p99 latency"""
+    return metrics_snapshot()
+
 # Root endpoint
 @app.get("/")
 async def root():
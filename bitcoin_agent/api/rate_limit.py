@@ -0,0 +1,156 @@
+import math
+import time
+from collections import Counter, deque
+from threading import Lock
+from typing import Deque, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.services.auth_service import verify_token
+from bitcoin_agent.services.redis_service import redis_service
+
+
+class LoadShedder:
+    """Tracks in-flight requests and recent latencies of the protected endpoints"""
+
+    def __init__(self, window_seconds: float = settings.SHED_WINDOW_SECONDS):
+        self.window_seconds = window_seconds
+        self.in_flight = 0
+        self.open_streams = 0
+        self._samples: Deque[Tuple[float, float]] = deque()
+        self._p99: Optional[float] = None
+        self._p99_at = 0.0
+        self._lock = Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._samples and self._samples[0][0] < now - self.window_seconds:
+            self._samples.popleft()
+
+    def p99_ms(self) -> Optional[float]:
+        now = time.monotonic()
+        with self._lock:
+            # Recomputed at most once a second; samples age out, so shedding can't latch on
+            if now - self._p99_at >= 1.0:
+                self._expire(now)
+                latencies = sorted(ms for _, ms in self._samples)
+                self._p99 = latencies[min(len(latencies) - 1, math.ceil(len(latencies) * 0.99) - 1)] if latencies else None
+                self._p99_at = now
+            return self._p99
+
+    def should_shed(self) -> bool:
+        if self.in_flight >= settings.SHED_MAX_IN_FLIGHT:
+            return True
+        p99 = self.p99_ms()
+        return p99 is not None and p99 > settings.SHED_P99_MS
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._samples.append((time.monotonic(), elapsed_ms))
+
+    def stream_opened(self) -> None:
+        with self._lock:
+            self.open_streams += 1
+
+    def stream_closed(self) -> None:
+        with self._lock:
+            self.open_streams -= 1
+
+
+load_shedder = LoadShedder()
+metrics: Counter = Counter()
+
+
+def client_identity(request: Request) -> str:
+    """Bucket key: the JWT subject when present (no DB lookup), else the client address"""
+    auth = request.headers.get("authorization", "")
+    if auth.lower().startswith("bearer "):
+        payload = verify_token(auth[7:])
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+def _reject(detail: str, retry_after: float, status_code: int = 429) -> JSONResponse:
+    return JSONResponse(
+        status_code=status_code,
+        content={"detail": detail},
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+class RateLimitMiddleware(BaseHTTPMiddleware):
+    """Per-user/per-endpoint token buckets plus global load shedding for expensive endpoints.
+
+    Rate-limited clients get 429; when the service itself is saturated (too many requests in
+    flight or p99 above SHED_P99_MS) everyone gets 503. Both carry Retry-After. If Redis is
+    unavailable, requests are let through.
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        path = request.url.path
+        limit = settings.RATE_LIMITS.get(path)
+        if limit is None:
+            return await call_next(request)
+
+        metrics[f"requests:{path}"] += 1
+
+        # Shed before taking a token so a 503 doesn't cost the client part of its quota
+        if load_shedder.should_shed():
+            metrics[f"shed:{path}"] += 1
+            return _reject("Service overloaded, retry later", settings.SHED_RETRY_AFTER_SECONDS, 503)
+
+        capacity, refill_per_second = limit
+        key = f"ratelimit:{path}:{client_identity(request)}"
+        try:
+            allowed, retry_after = await run_in_threadpool(
+                redis_service.take_token, key, capacity, refill_per_second
+            )
+        except Exception as e:
+            metrics["rate_limiter_errors"] += 1
+            print(f"Rate limiter error: {e}")
+            allowed, retry_after = True, 0.0
+        if not allowed:
+            metrics[f"rate_limited:{path}"] += 1
+            return _reject("Rate limit exceeded", retry_after)
+
+        load_shedder.started()
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            # Latency and in-flight cover the work up to the response headers: a /chat/batch
+            # stream runs for minutes and would otherwise become the window's p99 (shedding
+            # every interactive request) and hold a slot for its whole run
+            load_shedder.finished((time.perf_counter() - start) * 1000)
+
+        # Bodies still being streamed are tracked separately for /metrics
+        body = response.body_iterator
+
+        async def tracked_body():
+            load_shedder.stream_opened()
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                load_shedder.stream_closed()
+
+        response.body_iterator = tracked_body()
+        return response
+
+
+def metrics_snapshot() -> Dict:
+    return {
+        "counters": dict(metrics),
+        "in_flight": load_shedder.in_flight,
+        "open_streams": load_shedder.open_streams,
+        "p99_ms": load_shedder.p99_ms(),
+    }
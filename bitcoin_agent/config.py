@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -10,6 +10,49 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     REDIS_URL: str
 
+    # Embedding storage: "vector" (float32), "halfvec" (float16) or "binary"
+    # (bit vectors for a Hamming-distance candidate scan, re-scored on the halfvec column)
+    EMBEDDING_STORAGE: str = "vector"
+    BINARY_RESCORE_FACTOR: int = 10
+
+    # Per-collection chunking overrides of ChunkingConfig fields, e.g.
+    # {"bips": {"chunk_size": 240, "chunk_overlap": 32}}; other collections use "bitcoin_docs"'s
+    CHUNKING: Dict[str, Dict[str, int]] = {}
+
+    # Retrieval: over-fetch from pgvector, rerank with a cross-encoder, keep what passes
+    RERANK_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANK_CANDIDATES: int = 20
+    RERANK_MIN_SCORE: float = 0.1  # sigmoid probability in [0, 1]
+    RERANK_CACHE_SIZE: int = 4096
+
+    # Prompt sizing: retrieved context never exceeds RAG_CONTEXT_TOKENS nor what the window leaves
+    LLM_CONTEXT_WINDOW: int = 8192
+    PROMPT_RESERVED_TOKENS: int = 512
+    RAG_CONTEXT_TOKENS: int = 1024
+
+    # Conversations idle this long are moved from messages into zstd NDJSON files
+    ARCHIVE_DIR: str = "./archive"
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_ZSTD_LEVEL: int = 10
+
+    # Batch chat jobs: prompts embedded/reranked together per window, LLM calls run concurrently
+    BATCH_CONCURRENCY: int = 4
+    BATCH_MAX_CONCURRENCY: int = 16
+    BATCH_WINDOW_SIZE: int = 64
+    BATCH_JOB_TTL_SECONDS: int = 7 * 24 * 3600
+
+    # Admission control: per-user token buckets {path: [capacity, refill tokens/second]}
+    RATE_LIMITS: Dict[str, List[float]] = {
+        "/chat": [10, 0.5],
+        "/chat/batch": [2, 0.01],
+        "/search": [30, 2.0],
+    }
+    # Global load shedding on the rate-limited endpoints
+    SHED_MAX_IN_FLIGHT: int = 64
+    SHED_P99_MS: float = 10000
+    SHED_WINDOW_SECONDS: float = 30
+    SHED_RETRY_AFTER_SECONDS: int = 5
+
     class Config:
         env_file = ".env"
 
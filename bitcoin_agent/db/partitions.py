@@ -0,0 +1,75 @@
+from datetime import date
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+MESSAGES_PARTITION_PREFIX = "messages_y"
+MESSAGES_DEFAULT_PARTITION = "messages_default"
+
+def month_start(day: date, offset: int = 0) -> date:
+    month = day.year * 12 + day.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+def message_partition_name(month: date) -> str:
+    return f"{MESSAGES_PARTITION_PREFIX}{month.year}m{month.month:02d}"
+
+def create_message_partition(conn: Connection, month: date) -> bool:
+    """Attach the partition for ``month`` unless it exists, moving its rows out of the default partition.
+
+    Once the default partition holds rows for a month, ``CREATE TABLE ... PARTITION OF`` fails,
+    so the table is created detached, filled from the default partition and then attached.
+    """
+    name = message_partition_name(month)
+    if conn.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar() is not None:
+        return False
+    lower, upper = month.isoformat(), month_start(month, 1).isoformat()
+    conn.execute(text(f"CREATE TABLE {name} (LIKE messages INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {MESSAGES_DEFAULT_PARTITION} "
+        f"WHERE created_at >= '{lower}' AND created_at < '{upper}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    conn.execute(text(f"ALTER TABLE messages ATTACH PARTITION {name} FOR VALUES FROM ('{lower}') TO ('{upper}')"))
+    return True
+
+def ensure_message_partitions(engine: Engine, months_ahead: int = 3, start: date = None) -> List[str]:
+    """Create monthly messages partitions from ``start`` (default: this month) through ``months_ahead``.
+
+    A DEFAULT partition catches rows outside every monthly range so inserts never fail. Each
+    month runs in its own transaction, so one failure doesn't roll back the others; run this
+    on a schedule (``bitcoin-agent-archive`` does) rather than only at startup.
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE IF NOT EXISTS {MESSAGES_DEFAULT_PARTITION} PARTITION OF messages DEFAULT"))
+    first = month_start(start or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = month_start(first, offset)
+        try:
+            with engine.begin() as conn:
+                if create_message_partition(conn, month):
+                    created.append(message_partition_name(month))
+        except Exception as e:
+            print(f"⚠ Warning: Could not create partition {message_partition_name(month)}: {e}")
+    return created
+
+def list_message_partitions(conn: Connection) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE parent.relname = 'messages' AND child.relname LIKE :prefix "
+        "ORDER BY child.relname"
+    ), {"prefix": f"{MESSAGES_PARTITION_PREFIX}%"}).scalars())
+
+def drop_empty_message_partitions(conn: Connection, before: date) -> List[str]:
+    """Drop monthly partitions that end before ``before`` and hold no rows (all archived)"""
+    dropped = []
+    cutoff = message_partition_name(month_start(before))
+    for name in list_message_partitions(conn):
+        if name >= cutoff:
+            continue
+        if conn.execute(text(f"SELECT 1 FROM {name} LIMIT 1")).first() is None:
+            conn.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    return dropped
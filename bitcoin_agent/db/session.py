@@ -14,7 +14,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def init_db():
     from bitcoin_agent.db.base import Base
+    from bitcoin_agent.db.partitions import ensure_message_partitions
     Base.metadata.create_all(bind=engine)
+    ensure_message_partitions(engine)
     print("✓ Database tables created")
 
 def get_db() -> Generator[Session, None, None]:
@@ -33,4 +35,11 @@ def enable_pgvector():
         print("✓ pgvector extension enabled")
     except Exception as e:
         print(f"⚠ Warning: Could not enable pgvector: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def ensure_partitions(months_ahead: int = 3):
+    """Make sure upcoming monthly messages partitions exist"""
+    from bitcoin_agent.db.partitions import ensure_message_partitions
+    for name in ensure_message_partitions(engine, months_ahead):
+        print(f"✓ Created partition {name}")
+    print("✓ messages partitions ready")
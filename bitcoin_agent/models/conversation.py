@@ -1,6 +1,7 @@
-from sqlalchemy import String, ForeignKey, Integer
+from sqlalchemy import String, ForeignKey, Integer, DateTime
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from bitcoin_agent.db.base import Base, TimestampMixin
+from datetime import datetime
 from typing import List, Optional
 
 class Conversation(Base, TimestampMixin):
@@ -9,6 +10,11 @@ class Conversation(Base, TimestampMixin):
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    # Set once cold messages have been moved out of the hot messages table
+    archived_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    archive_path: Mapped[Optional[str]] = mapped_column(String(500), nullable=True)
+    archived_message_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
     
     # Relationships
     user: Mapped["User"] = relationship("User", back_populates="conversations")# type: ignore
@@ -1,6 +1,6 @@
-from sqlalchemy import String, Text, DateTime, ForeignKey, Index, Integer
+from sqlalchemy import String, Text, DateTime, ForeignKey, Index, Integer, BigInteger
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC, BIT
 from bitcoin_agent.db.base import Base, TimestampMixin
 from typing import Optional, List
 
@@ -24,12 +24,28 @@ class DocumentChunk(Base, TimestampMixin):
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
     document_id: Mapped[int] = mapped_column(ForeignKey("documents.id"), index=True)
+    # Denormalized from Document.vector_collection so scoped searches hit per-collection partial indexes
+    collection: Mapped[str] = mapped_column(String(100), default="bitcoin_docs", index=True)
     content: Mapped[str] = mapped_column(Text)
     chunk_index: Mapped[int] = mapped_column(Integer)
-    embedding = mapped_column(Vector(384))
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, index=True)
+    simhash: Mapped[Optional[int]] = mapped_column(BigInteger, nullable=True)
+    # Which embedding columns are filled depends on settings.EMBEDDING_STORAGE;
+    # deferred so loading chunks for display doesn't pull vectors over the wire
+    embedding = mapped_column(Vector(384), nullable=True, deferred=True)
+    embedding_half = mapped_column(HALFVEC(384), nullable=True, deferred=True)
+    embedding_bits = mapped_column(BIT(384), nullable=True, deferred=True)
 
     document: Mapped["Document"] = relationship("Document", back_populates="chunks")
     
     __table_args__ = (
         Index('ix_document_chunks_embedding', 'embedding', postgresql_using='ivfflat'),
+        Index(
+            'ix_document_chunks_embedding_half', 'embedding_half', postgresql_using='hnsw',
+            postgresql_ops={'embedding_half': 'halfvec_cosine_ops'}
+        ),
+        Index(
+            'ix_document_chunks_embedding_bits', 'embedding_bits', postgresql_using='hnsw',
+            postgresql_ops={'embedding_bits': 'bit_hamming_ops'}
+        ),
     )
\ No newline at end of file
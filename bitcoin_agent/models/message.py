@@ -1,7 +1,8 @@
-from sqlalchemy import String, ForeignKey, Integer, Text, Enum as SQLEnum
+from sqlalchemy import String, ForeignKey, Integer, Text, DateTime, Index, func, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from bitcoin_agent.db.base import Base, TimestampMixin
 # from bitcoin_agent.models.conversation import Conversation
+from datetime import datetime
 from enum import Enum
 
 class MessageRole(str, Enum):
@@ -12,10 +13,21 @@ class MessageRole(str, Enum):
 class Message(Base, TimestampMixin):
     __tablename__ = "messages"
     
-    id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    conversation_id: Mapped[int] = mapped_column(ForeignKey("conversations.id"), index=True)
+    # Range-partitioned by month on created_at, so the partition key is part of the primary key
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True, index=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=True
+    )
+    conversation_id: Mapped[int] = mapped_column(ForeignKey("conversations.id"))
     role: Mapped[MessageRole] = mapped_column(SQLEnum(MessageRole))
     content: Mapped[str] = mapped_column(Text)
     
     # Relationships
-    conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="messages")# type: ignore
\ No newline at end of file
+    conversation: Mapped["Conversation"] = relationship("Conversation", back_populates="messages")# type: ignore
+
+    __table_args__ = (
+        Index('ix_messages_conversation_id_created_at', 'conversation_id', 'created_at'),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
\ No newline at end of file
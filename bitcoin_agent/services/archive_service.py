@@ -0,0 +1,163 @@
+import argparse
+import io
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import zstandard
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.db.partitions import drop_empty_message_partitions
+from bitcoin_agent.models.conversation import Conversation
+from bitcoin_agent.models.message import Message, MessageRole
+
+
+def _serialize(message: Message) -> Dict:
+    return {
+        "id": message.id,
+        "role": message.role.value,
+        "content": message.content,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def _deserialize(row: Dict, conversation_id: int) -> Message:
+    # Transient (never added to a session) so callers treat it like any other Message
+    return Message(
+        id=row["id"],
+        conversation_id=conversation_id,
+        role=MessageRole(row["role"]),
+        content=row["content"],
+        created_at=datetime.fromisoformat(row["created_at"]),
+    )
+
+
+def _read_rows(path: Path) -> List[Dict]:
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor().stream_reader(f)
+        return [json.loads(line) for line in io.TextIOWrapper(reader, encoding="utf-8") if line.strip()]
+
+
+def _write_rows(path: Path, rows: List[Dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_path, "wb") as f:
+        with zstandard.ZstdCompressor(level=settings.ARCHIVE_ZSTD_LEVEL).stream_writer(f) as writer:
+            for row in rows:
+                writer.write((json.dumps(row, ensure_ascii=False) + "\n").encode("utf-8"))
+    os.replace(tmp_path, path)  # never leave a half-written archive in place
+
+
+def archive_dir() -> Path:
+    return Path(settings.ARCHIVE_DIR).expanduser().resolve()
+
+
+def archive_file(conversation: Conversation) -> Optional[Path]:
+    """Absolute path of a conversation's archive; only the file name is stored on the row"""
+    if not conversation.archive_path:
+        return None
+    path = archive_dir() / Path(conversation.archive_path).name
+    if not path.exists():
+        # A recorded archive that can't be found means history would silently vanish
+        raise FileNotFoundError(f"Archive for conversation {conversation.id} not found: {path}")
+    return path
+
+
+def read_archived_messages(conversation: Conversation) -> List[Message]:
+    """Archived messages of a conversation in chronological order"""
+    path = archive_file(conversation)
+    if path is None:
+        return []
+    return [_deserialize(row, conversation.id) for row in _read_rows(path)]
+
+
+def archive_conversation(db: Session, conversation: Conversation) -> int:
+    """Move a conversation's hot messages into its zstd NDJSON archive file"""
+    hot = db.query(Message).filter(
+        Message.conversation_id == conversation.id
+    ).order_by(Message.created_at, Message.id).all()
+    if not hot:
+        return 0
+
+    rows: Dict[int, Dict] = {}
+    existing = archive_file(conversation)
+    if existing is not None:
+        rows = {row["id"]: row for row in _read_rows(existing)}
+    rows.update({message.id: _serialize(message) for message in hot})
+    ordered = sorted(rows.values(), key=lambda row: (row["created_at"], row["id"]))
+
+    path = archive_dir() / f"conversation_{conversation.id}.ndjson.zst"
+    _write_rows(path, ordered)
+
+    # Only delete what was written: messages inserted meanwhile stay hot for the next run.
+    # The file already holds a superset, so a failure below is safe to retry
+    db.execute(delete(Message).where(
+        Message.conversation_id == conversation.id,
+        Message.id.in_([message.id for message in hot]),
+        Message.created_at <= hot[-1].created_at,
+    ))
+    conversation.archive_path = path.name
+    conversation.archived_at = datetime.now(timezone.utc)
+    conversation.archived_message_count = len(ordered)
+    db.commit()
+    return len(hot)
+
+
+def find_cold_conversations(db: Session, cutoff: datetime, limit: int = 100) -> List[Conversation]:
+    """Conversations with hot messages whose latest message is older than ``cutoff``"""
+    cold_ids = (
+        select(Message.conversation_id)
+        .group_by(Message.conversation_id)
+        .having(func.max(Message.created_at) < cutoff)
+        .limit(limit)
+    )
+    return db.query(Conversation).filter(Conversation.id.in_(cold_ids)).all()
+
+
+def archive_cold_conversations(db: Session, days: int = None, batch_size: int = 100) -> int:
+    """Archive every conversation idle for ``days`` and drop monthly partitions left empty"""
+    days = days if days is not None else settings.ARCHIVE_AFTER_DAYS
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+
+    archived = 0
+    while True:
+        conversations = find_cold_conversations(db, cutoff, batch_size)
+        if not conversations:
+            break
+        for conversation in conversations:
+            moved = archive_conversation(db, conversation)
+            archived += 1
+            print(f"✓ Archived {moved} messages from conversation {conversation.id}")
+
+    dropped = drop_empty_message_partitions(db.connection(), cutoff.date())
+    db.commit()
+    for name in dropped:
+        print(f"✓ Dropped empty partition {name}")
+    return archived
+
+
+def main():
+    from bitcoin_agent.db.session import SessionLocal, ensure_partitions
+
+    parser = argparse.ArgumentParser(description="Archive cold conversations out of the messages table")
+    parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                        help="archive conversations idle for at least this many days")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    # Run from cron, so this also keeps upcoming partitions ahead of long-lived API processes
+    ensure_partitions()
+    db = SessionLocal()
+    try:
+        count = archive_cold_conversations(db, args.days, args.batch_size)
+        print(f"✓ Archived {count} conversations")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import argparse
+import json
+import sys
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from bitcoin_agent.agent import build_rag_context, needs_rag, process_user_input
+from bitcoin_agent.config import settings
+from bitcoin_agent.db.session import SessionLocal
+from bitcoin_agent.services.conversation_service import create_conversation
+from bitcoin_agent.services.redis_service import redis_service
+from bitcoin_agent.services.rerank_service import rerank_service
+
+
+def parse_prompt_line(line: str) -> Optional[str]:
+    """An NDJSON line may be a JSON string, an object with "prompt", or plain text"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError:
+        return line
+    if isinstance(value, dict):
+        return value.get("prompt")
+    return value if isinstance(value, str) else None
+
+
+def _job_key(job_id: str) -> str:
+    return f"batch:{job_id}"
+
+
+def _results_key(job_id: str) -> str:
+    return f"batch:{job_id}:results"
+
+
+def start_job(user_id: int, job_id: Optional[str] = None) -> Tuple[str, int]:
+    """Create or resume a job; returns (job_id, conversation_id) shared by all its prompts"""
+    if job_id:
+        job = redis_service.get(_job_key(job_id))
+        if job:
+            if job["user_id"] != user_id:
+                raise PermissionError("Batch job belongs to another user")
+            return job_id, job["conversation_id"]
+    job_id = job_id or uuid.uuid4().hex
+
+    db = SessionLocal()
+    try:
+        conversation = create_conversation(db, user_id, title=f"Batch {job_id}")
+        conversation_id = conversation.id
+    finally:
+        db.close()
+    redis_service.set(
+        _job_key(job_id), {"user_id": user_id, "conversation_id": conversation_id},
+        expire_seconds=settings.BATCH_JOB_TTL_SECONDS
+    )
+    return job_id, conversation_id
+
+
+def _retrieve_contexts(prompts: List[str], collection: Optional[str]) -> Dict[str, str]:
+    """RAG context for every distinct prompt of a window: one embedding call, one rerank pass"""
+    queries = sorted({prompt for prompt in prompts if needs_rag(prompt)})
+    if not queries:
+        return {}
+    db = SessionLocal()
+    try:
+        retrieved = rerank_service.retrieve_many(db, queries, collection=collection)
+        return {query: build_rag_context(results) for query, results in zip(queries, retrieved)}
+    finally:
+        db.close()
+
+
+def _complete(job_id: str, conversation_id: int, index: int, prompt: str, rag_context: str) -> Dict:
+    db = SessionLocal()
+    try:
+        response = process_user_input(prompt, db, conversation_id, rag_context=rag_context)
+        return {"job_id": job_id, "index": index, "prompt": prompt, "response": response}
+    except Exception as e:
+        db.rollback()
+        return {"job_id": job_id, "index": index, "prompt": prompt, "error": str(e)}
+    finally:
+        db.close()
+
+
+def run_batch(
+    prompts: Iterable[str],
+    user_id: int,
+    job_id: Optional[str] = None,
+    concurrency: int = settings.BATCH_CONCURRENCY,
+    collection: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Run prompts through the chat pipeline, yielding each result as it completes.
+
+    Prompts are consumed in windows of BATCH_WINDOW_SIZE, so NDJSON streams of any length
+    are processed in bounded memory. The next window is retrieved while the previous one's
+    LLM calls are still running, so ``concurrency`` calls stay in flight across windows.
+    Completed results are recorded per job in Redis; re-running with the same ``job_id``
+    replays them and only processes the rest.
+    Failed prompts are reported but not recorded, so a resume retries them.
+    """
+    concurrency = max(1, min(concurrency, settings.BATCH_MAX_CONCURRENCY))
+    job_id, conversation_id = start_job(user_id, job_id)
+    done = redis_service.hgetall(_results_key(job_id))
+
+    def drain(in_flight: Set[Future], keep: int) -> Iterator[Dict]:
+        # Yield completed results until at most ``keep`` futures are still pending
+        while len(in_flight) > keep:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.remove(future)
+                result = future.result()
+                if "error" not in result:
+                    redis_service.hset(
+                        _results_key(job_id), str(result["index"]), result,
+                        expire_seconds=settings.BATCH_JOB_TTL_SECONDS
+                    )
+                yield result
+
+    numbered = enumerate(prompt for prompt in prompts if prompt)
+    in_flight: Set[Future] = set()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while True:
+            window = list(islice(numbered, settings.BATCH_WINDOW_SIZE))
+            if not window:
+                break
+
+            pending = []
+            for index, prompt in window:
+                if str(index) in done:
+                    yield {**done[str(index)], "resumed": True}
+                else:
+                    pending.append((index, prompt))
+            if not pending:
+                continue
+
+            # Workers keep completing the previous window while this one is retrieved
+            contexts = _retrieve_contexts([prompt for _, prompt in pending], collection)
+            for index, prompt in pending:
+                in_flight.add(executor.submit(
+                    _complete, job_id, conversation_id, index, prompt, contexts.get(prompt, "")
+                ))
+            # Leave ``concurrency`` calls running so no worker idles during the next retrieval,
+            # while the executor queue (and memory) stays bounded by one window
+            yield from drain(in_flight, concurrency)
+        yield from drain(in_flight, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of prompts through the Bitcoin agent")
+    parser.add_argument("--user-id", type=int, required=True, help="user that owns the batch conversation")
+    parser.add_argument("--input", default="-", help="NDJSON/text file with one prompt per line (default: stdin)")
+    parser.add_argument("--job-id", help="resume a previous job")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    parser.add_argument("--collection", help="restrict retrieval to one vector collection")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        prompts = (parse_prompt_line(line) for line in source)
+        for result in run_batch(prompts, args.user_id, args.job_id, args.concurrency, args.collection):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
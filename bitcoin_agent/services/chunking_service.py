@@ -0,0 +1,262 @@
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from hashlib import blake2b, sha256
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import re
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from transformers import AutoTokenizer
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.models.document import DocumentChunk
+
+TOKENIZER_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_WORD_RE = re.compile(r"\w+")
+
+# Streaming splits the buffer once it holds roughly this many chunks' worth of text
+STREAM_WINDOW_CHUNKS = 16
+# ...and splits it regardless of whitespace once it reaches this many windows
+STREAM_MAX_WINDOWS = 4
+_CHARS_PER_TOKEN = 5
+
+# Chunks a deduplicator tracks in memory; about 650 B each, so memory stays under ~65 MB
+DEDUP_MAX_TRACKED = 100_000
+
+
+@dataclass(frozen=True)
+class ChunkingConfig:
+    """Chunk sizing (in MiniLM tokens) and de-duplication settings for a collection."""
+    chunk_size: int = 200          # MiniLM truncates at 256 word pieces, keep headroom
+    chunk_overlap: int = 20
+    min_chunk_tokens: int = 8      # drop fragments too short to be useful
+    max_chunks: Optional[int] = None
+    near_duplicate_distance: int = 3  # max SimHash Hamming distance treated as duplicate
+    shingle_size: int = 3
+
+
+DEFAULT_COLLECTION = "bitcoin_docs"
+
+
+def get_chunking_config(collection: str) -> ChunkingConfig:
+    """ChunkingConfig defaults overridden by settings.CHUNKING for the collection"""
+    overrides = settings.CHUNKING.get(collection, settings.CHUNKING.get(DEFAULT_COLLECTION, {}))
+    unknown = set(overrides) - set(ChunkingConfig.__dataclass_fields__)
+    if unknown:
+        raise ValueError(f"Unknown chunking settings for {collection}: {', '.join(sorted(unknown))}")
+    return ChunkingConfig(**overrides)
+
+
+@lru_cache(maxsize=1)
+def get_tokenizer():
+    """Load the MiniLM tokenizer once per process"""
+    return AutoTokenizer.from_pretrained(TOKENIZER_NAME)
+
+
+def count_tokens(text: str) -> int:
+    return len(get_tokenizer().encode(text, add_special_tokens=False))
+
+
+def content_hash(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def simhash(text: str, shingle_size: int = 3) -> int:
+    """64-bit SimHash over word shingles"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    weights = [0] * SIMHASH_BITS
+    for shingle in shingles:
+        h = int.from_bytes(blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if (h >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def to_signed64(value: int) -> int:
+    """Map an unsigned 64-bit fingerprint onto Postgres BIGINT range"""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def to_unsigned64(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class ChunkDeduplicator:
+    """Rejects exact (sha256) and near (SimHash) duplicate chunks in bounded memory.
+
+    Only the latest ``max_tracked`` chunks are kept: digests as 32-byte ``bytes`` and
+    fingerprints bucketed by 16-bit bands, so any fingerprint within ``near_duplicate_distance``
+    (< number of bands) of a tracked one shares a bucket with it. Exact duplicates of older
+    chunks are caught by ``drop_stored`` through the indexed ``content_hash`` column; near
+    duplicates only within the tracked window.
+    """
+
+    def __init__(self, config: ChunkingConfig, max_tracked: int = DEDUP_MAX_TRACKED):
+        self.config = config
+        self.max_tracked = max_tracked
+        self.collection: Optional[str] = None
+        self.hashes: Set[bytes] = set()
+        self.bands: List[Dict[int, List[int]]] = [{} for _ in range(SIMHASH_BANDS)]
+        self._recent: Deque[Tuple[bytes, int]] = deque()
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        mask = (1 << _BAND_BITS) - 1
+        return [(fingerprint >> (i * _BAND_BITS)) & mask for i in range(SIMHASH_BANDS)]
+
+    def _evict_oldest(self) -> None:
+        digest, fingerprint = self._recent.popleft()
+        self.hashes.discard(digest)
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            bucket = band[key]
+            bucket.remove(fingerprint)
+            if not bucket:
+                del band[key]
+
+    def add(self, digest: str, fingerprint: int) -> None:
+        key = bytes.fromhex(digest)
+        if key in self.hashes:
+            return
+        if len(self._recent) >= self.max_tracked:
+            self._evict_oldest()
+        self._recent.append((key, fingerprint))
+        self.hashes.add(key)
+        for band, band_key in zip(self.bands, self._band_keys(fingerprint)):
+            band.setdefault(band_key, []).append(fingerprint)
+
+    def is_near_duplicate(self, fingerprint: int) -> bool:
+        for band, key in zip(self.bands, self._band_keys(fingerprint)):
+            for seen in band.get(key, ()):
+                if bin(seen ^ fingerprint).count("1") <= self.config.near_duplicate_distance:
+                    return True
+        return False
+
+    def check(self, text: str) -> Optional[Tuple[str, int]]:
+        """Return (content_hash, simhash) for a new chunk, or None if it is a duplicate"""
+        digest = content_hash(text)
+        if bytes.fromhex(digest) in self.hashes:
+            return None
+        fingerprint = simhash(text, self.config.shingle_size)
+        if self.is_near_duplicate(fingerprint):
+            return None
+        self.add(digest, fingerprint)
+        return digest, fingerprint
+
+    def seed(self, db: Session, collection: str) -> None:
+        """Track the latest chunks already stored for a collection and check older ones in the DB"""
+        self.collection = collection
+        stmt = (
+            select(DocumentChunk.content_hash, DocumentChunk.simhash)
+            .where(DocumentChunk.collection == collection)
+            .where(DocumentChunk.content_hash.is_not(None))
+            .order_by(DocumentChunk.id.desc())
+            .limit(self.max_tracked)
+        )
+        for digest, fingerprint in reversed(db.execute(stmt).all()):
+            self.add(digest, to_unsigned64(fingerprint or 0))
+
+    def drop_stored(self, db: Session, chunks: List[Tuple[int, str, str, int]]) -> List[Tuple[int, str, str, int]]:
+        """Drop chunks whose content_hash is already stored in the seeded collection (one query)"""
+        if self.collection is None or not chunks:
+            return chunks
+        stored = set(db.execute(
+            select(DocumentChunk.content_hash)
+            .where(DocumentChunk.collection == self.collection)
+            .where(DocumentChunk.content_hash.in_({chunk[2] for chunk in chunks}))
+        ).scalars())
+        return [chunk for chunk in chunks if chunk[2] not in stored]
+
+
+class ChunkingService:
+    def __init__(self):
+        self._splitters: Dict[ChunkingConfig, RecursiveCharacterTextSplitter] = {}
+
+    def get_splitter(self, config: ChunkingConfig) -> RecursiveCharacterTextSplitter:
+        if config not in self._splitters:
+            self._splitters[config] = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                get_tokenizer(),
+                chunk_size=config.chunk_size,
+                chunk_overlap=config.chunk_overlap,
+            )
+        return self._splitters[config]
+
+    def split(self, text: str, config: ChunkingConfig) -> List[str]:
+        return self.get_splitter(config).split_text(text)
+
+    def chunk_stream(
+        self,
+        blocks: Iterable[str],
+        config: ChunkingConfig,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        """Yield (position, chunk_text, content_hash, simhash) for every non-duplicate chunk.
+
+        Text arrives as blocks and is split in bounded windows; the last chunk of each window
+        is carried over so chunk boundaries do not depend on block boundaries. ``position`` is
+        the chunk's place in the split document, so gaps mark dropped chunks.
+        """
+        deduplicator = deduplicator or ChunkDeduplicator(config)
+        window = config.chunk_size * _CHARS_PER_TOKEN * STREAM_WINDOW_CHUNKS
+        position = 0
+        emitted = 0
+        buffer = ""
+
+        def pieces() -> Iterator[str]:
+            nonlocal buffer
+            for block in blocks:
+                buffer += block
+                if len(buffer) < window:
+                    continue
+                # only split up to the last whitespace so no word is cut at a block edge
+                cut = max(buffer.rfind(" "), buffer.rfind("\n"))
+                split = self.split(buffer[:cut], config) if cut > 0 else []
+                if len(split) >= 2:
+                    buffer = split[-1] + buffer[cut:]
+                    yield from split[:-1]
+                elif len(buffer) >= window * STREAM_MAX_WINDOWS:
+                    # No usable whitespace (minified or base64 text): split as-is so the
+                    # buffer can't grow to the size of the file
+                    split = self.split(buffer, config)
+                    buffer = split[-1] if len(split) >= 2 else ""
+                    yield from split[:-1] if len(split) >= 2 else split
+            if buffer.strip():
+                yield from self.split(buffer, config)
+
+        for chunk in pieces():
+            if config.max_chunks is not None and emitted >= config.max_chunks:
+                break
+            current, position = position, position + 1
+            if count_tokens(chunk) < config.min_chunk_tokens:
+                continue
+            fingerprints = deduplicator.check(chunk)
+            if fingerprints is None:
+                continue
+            emitted += 1
+            yield current, chunk, fingerprints[0], fingerprints[1]
+
+    def chunk_document(
+        self,
+        text: str,
+        config: ChunkingConfig,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ) -> Iterator[Tuple[int, str, str, int]]:
+        return self.chunk_stream([text], config, deduplicator)
+
+
+chunking_service = ChunkingService()
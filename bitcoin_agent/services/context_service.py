@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.services.chunking_service import count_tokens
+from bitcoin_agent.services.rerank_service import RetrievedChunk
+
+MIN_OVERLAP_CHARS = 8
+
+
+def context_token_budget(max_completion_tokens: int) -> int:
+    """RAG budget capped by what is left of the model window after the reserved prompt and answer"""
+    available = settings.LLM_CONTEXT_WINDOW - settings.PROMPT_RESERVED_TOKENS - max_completion_tokens
+    return max(0, min(settings.RAG_CONTEXT_TOKENS, available))
+
+
+def strip_overlap(previous: str, following: str) -> str:
+    """Join two adjacent chunks, dropping the text the splitter repeated at the start of ``following``"""
+    for size in range(min(len(previous), len(following)), MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(following[:size]):
+            return previous + following[size:]
+    return previous + "\n" + following
+
+
+class ContextPacker:
+    """Turns ranked chunks into the smallest context block that fits a token budget.
+
+    Chunks are taken in rank order while they fit; adjacent chunks of the same document
+    (consecutive ``chunk_index``) are merged with their overlap removed, and each merged
+    passage is emitted once under its document title. Assembled blocks are cached by the
+    ranked chunk ids and budget.
+    """
+
+    def __init__(self, cache_size: int = 1024):
+        self._cache: "OrderedDict[Tuple[Tuple[int, ...], int], str]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = Lock()
+
+    def _assemble(self, selected: List[RetrievedChunk]) -> str:
+        # Group by document, keeping documents in order of their best-ranked chunk
+        documents: Dict[int, List[RetrievedChunk]] = {}
+        for result in selected:
+            documents.setdefault(result.chunk.document_id, []).append(result)
+
+        passages = []
+        for results in documents.values():
+            title = results[0].chunk.document.title
+            ordered = sorted(results, key=lambda r: r.chunk.chunk_index)
+            text = ordered[0].chunk.content
+            for previous, current in zip(ordered, ordered[1:]):
+                if current.chunk.chunk_index == previous.chunk.chunk_index + 1:
+                    text = strip_overlap(text, current.chunk.content)
+                else:
+                    passages.append(f"[{title}]\n{text}")
+                    text = current.chunk.content
+            passages.append(f"[{title}]\n{text}")
+        return "\n\n".join(passages)
+
+    def pack(self, results: List[RetrievedChunk], token_budget: Optional[int] = None) -> str:
+        if token_budget is None:
+            token_budget = settings.RAG_CONTEXT_TOKENS
+        if not results or token_budget <= 0:
+            return ""
+
+        key = (tuple(result.chunk.id for result in results), token_budget)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        selected: List[RetrievedChunk] = []
+        context = ""
+        for result in results:
+            candidate = self._assemble(selected + [result])
+            if count_tokens(candidate) <= token_budget:
+                selected.append(result)
+                context = candidate
+
+        with self._lock:
+            self._cache[key] = context
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return context
+
+
+context_packer = ContextPacker()
@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from bitcoin_agent.models.conversation import Conversation
 from bitcoin_agent.models.message import Message, MessageRole
+from bitcoin_agent.services.archive_service import read_archived_messages
 from typing import List, Optional
 
 def create_conversation(db: Session, user_id: int, title: Optional[str] = None) -> Conversation:
@@ -27,6 +28,14 @@ def add_message(db: Session, conversation_id: int, role: MessageRole, content: s
     return message
 
 def get_conversation_history(db: Session, conversation_id: int, limit: int = 50) -> List[Message]:
-    return db.query(Message).filter(
+    """Latest messages first; falls through to the archive once hot messages run out"""
+    messages = db.query(Message).filter(
         Message.conversation_id == conversation_id
-    ).order_by(Message.created_at.desc()).limit(limit).all()
\ No newline at end of file
+    ).order_by(Message.created_at.desc()).limit(limit).all()
+    
+    if len(messages) < limit:
+        conversation = db.get(Conversation, conversation_id)
+        if conversation and conversation.archive_path:
+            archived = read_archived_messages(conversation)
+            messages += list(reversed(archived))[:limit - len(messages)]
+    return messages
\ No newline at end of file
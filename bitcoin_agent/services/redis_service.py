@@ -2,11 +2,37 @@ import redis
 import json
 from bitcoin_agent.config import settings
 from datetime import timedelta
-from typing import Optional, Any
+from typing import Optional, Any, Dict, Tuple
+
+# Refill-then-take token bucket, evaluated atomically in Redis (one round trip per check).
+# Returns {allowed (0/1), seconds until enough tokens as a string}.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
 
 class RedisService:
     def __init__(self):
         self.redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+        self._token_bucket = self.redis_client.register_script(TOKEN_BUCKET_SCRIPT)
     
     def get(self, key: str) -> Optional[Any]:
         value = self.redis_client.get(key)
@@ -22,5 +48,24 @@ class RedisService:
     
     def delete(self, key: str) -> bool:
         return bool(self.redis_client.delete(key))
+
+    def hset(self, key: str, field: str, value: Any, expire_seconds: int = 300) -> bool:
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hset(key, field, json.dumps(value))
+            pipe.expire(key, timedelta(seconds=expire_seconds))
+            pipe.execute()
+            return True
+        except Exception as e:
+            print(f"Cache error: {e}")
+            return False
+
+    def take_token(self, key: str, capacity: float, refill_per_second: float, cost: float = 1) -> Tuple[bool, float]:
+        """Take ``cost`` tokens from a bucket; returns (allowed, retry_after_seconds)"""
+        allowed, retry_after = self._token_bucket(keys=[key], args=[capacity, refill_per_second, cost])
+        return bool(allowed), float(retry_after)
+
+    def hgetall(self, key: str) -> Dict[str, Any]:
+        return {field: json.loads(value) for field, value in self.redis_client.hgetall(key).items()}
     
 redis_service = RedisService()
\ No newline at end of file
@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import List, Optional, Tuple
+
+import torch
+from sentence_transformers import CrossEncoder
+from sqlalchemy.orm import Session
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.models.document import DocumentChunk
+from bitcoin_agent.services.vector_service import vector_service
+
+
+@dataclass
+class RetrievedChunk:
+    chunk: DocumentChunk
+    distance: float
+    rerank_score: Optional[float] = None
+
+    @property
+    def similarity(self) -> float:
+        return 1.0 - self.distance
+
+
+class RerankService:
+    """Second retrieval stage: scores (query, chunk) pairs with a small CPU cross-encoder"""
+
+    def __init__(self, model_name: str = settings.RERANK_MODEL, cache_size: int = settings.RERANK_CACHE_SIZE):
+        self.model_name = model_name
+        self._model: Optional[CrossEncoder] = None
+        self._cache: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = Lock()
+
+    @property
+    def model(self) -> CrossEncoder:
+        # Loaded on first use so processes that never rerank don't pay for it
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Explicit sigmoid: RERANK_MIN_SCORE is a probability, whatever the model config says
+                    self._model = CrossEncoder(self.model_name, device="cpu", activation_fn=torch.nn.Sigmoid())
+        return self._model
+
+    def _cache_get(self, key: Tuple[str, int]) -> Optional[float]:
+        with self._lock:
+            score = self._cache.get(key)
+            if score is not None:
+                self._cache.move_to_end(key)
+            return score
+
+    def _cache_put(self, key: Tuple[str, int], score: float) -> None:
+        with self._lock:
+            self._cache[key] = score
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def score_pairs(self, pairs: List[Tuple[str, DocumentChunk]], batch_size: int = 32) -> List[float]:
+        """Cross-encoder relevance in [0, 1] per (query, chunk); cached per (query, chunk id)"""
+        scores: List[Optional[float]] = [self._cache_get((query, chunk.id)) for query, chunk in pairs]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            predicted = self.model.predict(
+                [(pairs[i][0], pairs[i][1].content) for i in missing], batch_size=batch_size
+            )
+            for i, score in zip(missing, predicted):
+                scores[i] = float(score)
+                self._cache_put((pairs[i][0], pairs[i][1].id), scores[i])
+        return scores
+
+    def score(self, query: str, chunks: List[DocumentChunk], batch_size: int = 32) -> List[float]:
+        return self.score_pairs([(query, chunk) for chunk in chunks], batch_size)
+
+    def retrieve_many(
+        self,
+        db: Session,
+        queries: List[str],
+        query_embeddings: Optional[List[List[float]]] = None,
+        limit: int = 3,
+        candidates: int = settings.RERANK_CANDIDATES,
+        min_score: float = settings.RERANK_MIN_SCORE,
+        collection: Optional[str] = None,
+    ) -> List[List[RetrievedChunk]]:
+        """``retrieve`` for several queries, with one embedding call and one cross-encoder pass"""
+        if query_embeddings is None:
+            query_embeddings = vector_service.generate_embeddings(queries) if queries else []
+        hits = [
+            vector_service.search_with_scores(
+                db, query, max(limit, candidates), query_embedding=embedding, collection=collection
+            )
+            for query, embedding in zip(queries, query_embeddings)
+        ]
+
+        pairs = [(query, chunk) for query, query_hits in zip(queries, hits) for chunk, _ in query_hits]
+        scores = iter(self.score_pairs(pairs)) if pairs else iter(())
+
+        retrieved = []
+        for query_hits in hits:
+            results = []
+            for chunk, distance in query_hits:
+                score = next(scores)
+                if score >= min_score:
+                    results.append(RetrievedChunk(chunk=chunk, distance=distance, rerank_score=score))
+            results.sort(key=lambda r: r.rerank_score, reverse=True)
+            retrieved.append(results[:limit])
+        return retrieved
+
+    def retrieve(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 3,
+        candidates: int = settings.RERANK_CANDIDATES,
+        min_score: float = settings.RERANK_MIN_SCORE,
+        collection: Optional[str] = None,
+    ) -> List[RetrievedChunk]:
+        """Over-fetch candidates from pgvector, rerank them and keep at most ``limit`` above ``min_score``"""
+        return self.retrieve_many(
+            db, [query], limit=limit, candidates=candidates, min_score=min_score, collection=collection
+        )[0]
+
+rerank_service = RerankService()
@@ -1,39 +1,110 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, text, delete
+from bitcoin_agent.config import settings
 from bitcoin_agent.models.document import Document, DocumentChunk
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+from bitcoin_agent.services.chunking_service import (
+    chunking_service, ChunkDeduplicator, DEFAULT_COLLECTION, get_chunking_config, to_signed64
+)
 from sentence_transformers import SentenceTransformer
-from typing import List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import re
+
+EMBEDDING_STORAGES = ("vector", "halfvec", "binary")
+
+# (column, operator class) of each ANN index built per collection
+COLLECTION_INDEXES = (
+    ("embedding", "vector_cosine_ops"),
+    ("embedding_half", "halfvec_cosine_ops"),
+    ("embedding_bits", "bit_hamming_ops"),
+)
+# pgvector's default and maximum hnsw.ef_search
+HNSW_DEFAULT_EF_SEARCH = 40
+HNSW_MAX_EF_SEARCH = 1000
+# "ix_document_chunks_embedding_half_" takes 34 of Postgres' 63-character identifier limit;
+# longer names would be truncated and two collections could share one index name
+MAX_COLLECTION_LENGTH = 29
+
+_COLLECTION_RE = re.compile(rf"^[a-z0-9_]{{1,{MAX_COLLECTION_LENGTH}}}$")
+
+def validate_collection(collection: str) -> str:
+    # Collection names end up in index names and predicates
+    if not _COLLECTION_RE.match(collection):
+        raise ValueError(
+            f"Collection names may only contain lowercase letters, digits and underscores "
+            f"(at most {MAX_COLLECTION_LENGTH} characters)"
+        )
+    return collection
+
+def binary_quantize(embedding: List[float]) -> str:
+    """Sign-quantize to a bit string, matching pgvector's binary_quantize()"""
+    return "".join("1" if value > 0 else "0" for value in embedding)
 
 class VectorService:
     def __init__(self):
         self.model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50
-        )
     
     def generate_embedding(self, text: str):
         return self.model.encode(text).tolist()
+
+    def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=32).tolist()
+
+    def embedding_columns(self, embedding: List[float], storage: Optional[str] = None) -> Dict[str, Any]:
+        """Column values for an embedding under the configured storage layout"""
+        storage = storage or settings.EMBEDDING_STORAGE
+        if storage == "vector":
+            return {"embedding": embedding}
+        if storage == "halfvec":
+            return {"embedding_half": embedding}
+        if storage == "binary":
+            return {"embedding_half": embedding, "embedding_bits": binary_quantize(embedding)}
+        raise ValueError(f"Unknown embedding storage: {storage}")
     
-    def add_document(self, db: Session, title: str, content: str, file_path: str, doc_type: str) -> Document:
-        """Add document and its chunks to database"""
+    def add_document(
+        self,
+        db: Session,
+        title: str,
+        content: str,
+        file_path: str,
+        doc_type: str,
+        vector_collection: str = DEFAULT_COLLECTION,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ) -> Document:
+        """Add document and its chunks to database.
+
+        Chunks are sized in MiniLM tokens and exact/near duplicates (within the
+        collection, or across everything ``deduplicator`` has seen) are dropped
+        before embedding.
+        """
+        validate_collection(vector_collection)
+        config = get_chunking_config(vector_collection)
+        if deduplicator is None:
+            deduplicator = ChunkDeduplicator(config)
+            deduplicator.seed(db, vector_collection)
+
         # Create document
-        doc = Document(title=title, content=content[:1000], file_path=file_path, doc_type=doc_type)
+        doc = Document(
+            title=title, content=content[:1000], file_path=file_path,
+            doc_type=doc_type, vector_collection=vector_collection
+        )
         db.add(doc)
         db.flush()  # Get doc.id
         
-        # Split into chunks
-        chunks = self.text_splitter.split_text(content)
+        # Split into token-sized, de-duplicated chunks
+        chunks = list(chunking_service.chunk_document(content, config, deduplicator))
+        chunks = deduplicator.drop_stored(db, chunks)
+        embeddings = self.generate_embeddings([text for _, text, _, _ in chunks]) if chunks else []
         
         # Add chunks with embeddings
-        for idx, chunk_text in enumerate(chunks):
-            embedding = self.generate_embedding(chunk_text)
+        for (idx, chunk_text, digest, fingerprint), embedding in zip(chunks, embeddings):
             chunk = DocumentChunk(
                 document_id=doc.id,
+                collection=vector_collection,
                 content=chunk_text,
                 chunk_index=idx,
-                embedding=embedding
+                content_hash=digest,
+                simhash=to_signed64(fingerprint),
+                **self.embedding_columns(embedding)
             )
             db.add(chunk)
         
@@ -42,18 +113,166 @@ class VectorService:
         db.refresh(doc)
         return doc
     
-    def search_similar(self, db: Session, query: str, limit: int = 3) -> List[DocumentChunk]:
-        query_embedding = self.generate_embedding(query)
-        
-        stmt = (
-            select(DocumentChunk)
-            .order_by(DocumentChunk.embedding.cosine_distance(query_embedding))
-            .limit(limit)
+    def add_document_stream(
+        self,
+        db: Session,
+        title: str,
+        blocks: Iterable[str],
+        file_path: str,
+        doc_type: str,
+        vector_collection: str = DEFAULT_COLLECTION,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+        batch_size: int = 64,
+    ) -> Document:
+        """Add a document from a stream of text blocks with bounded memory.
+
+        Chunks are embedded and committed in rolling batches of ``batch_size`` through
+        Core inserts, so neither the full text nor the chunk ORM objects are held in memory.
+        If anything fails midway the document and its committed chunks are deleted again;
+        discard ``deduplicator`` then, since it has already seen the failed document's chunks.
+        """
+        validate_collection(vector_collection)
+        config = get_chunking_config(vector_collection)
+        if deduplicator is None:
+            deduplicator = ChunkDeduplicator(config)
+            deduplicator.seed(db, vector_collection)
+
+        doc = Document(
+            title=title, content="", file_path=file_path,
+            doc_type=doc_type, vector_collection=vector_collection
         )
+        db.add(doc)
+        db.commit()
+        doc_id = doc.id
+
+        preview: List[str] = []
+        preview_len = 0
+
+        def track_preview(source: Iterable[str]) -> Iterable[str]:
+            nonlocal preview_len
+            for block in source:
+                if preview_len < 1000:
+                    preview.append(block[:1000 - preview_len])
+                    preview_len += len(preview[-1])
+                yield block
+
+        try:
+            chunk_count = 0
+            batch = []
+            for item in chunking_service.chunk_stream(track_preview(blocks), config, deduplicator):
+                batch.append(item)
+                if len(batch) >= batch_size:
+                    chunk_count += self._insert_chunk_batch(db, doc_id, vector_collection, batch, deduplicator)
+                    batch = []
+            if batch:
+                chunk_count += self._insert_chunk_batch(db, doc_id, vector_collection, batch, deduplicator)
+        except BaseException:
+            # Don't leave a partial document behind: its chunks would count as duplicates on retry
+            db.rollback()
+            self.delete_document(db, doc_id)
+            raise
+
+        doc = db.get(Document, doc_id)
+        doc.content = "".join(preview)
+        doc.chunk_count = chunk_count
+        db.commit()
+        db.refresh(doc)
+        return doc
+
+    def delete_document(self, db: Session, document_id: int) -> None:
+        """Delete a document and all of its chunks"""
+        db.execute(delete(DocumentChunk).where(DocumentChunk.document_id == document_id))
+        db.execute(delete(Document).where(Document.id == document_id))
+        db.commit()
+
+    def _insert_chunk_batch(
+        self, db: Session, document_id: int, collection: str, batch, deduplicator: ChunkDeduplicator
+    ) -> int:
+        # Exact duplicates of chunks older than the deduplicator's in-memory window
+        batch = deduplicator.drop_stored(db, batch)
+        if not batch:
+            return 0
+        embeddings = self.generate_embeddings([text for _, text, _, _ in batch])
+        db.execute(insert(DocumentChunk), [
+            {
+                "document_id": document_id,
+                "collection": collection,
+                "content": chunk_text,
+                "chunk_index": idx,
+                "content_hash": digest,
+                "simhash": to_signed64(fingerprint),
+                **self.embedding_columns(embedding),
+            }
+            for (idx, chunk_text, digest, fingerprint), embedding in zip(batch, embeddings)
+        ])
+        db.commit()
+        return len(batch)
+    
+    def search_with_scores(
+        self,
+        db: Session,
+        query: str,
+        limit: int = 3,
+        query_embedding: Optional[List[float]] = None,
+        storage: Optional[str] = None,
+        collection: Optional[str] = None,
+    ) -> List[Tuple[DocumentChunk, float]]:
+        """Return the nearest chunks together with their cosine distance.
+
+        With binary storage the Hamming index supplies ``limit * BINARY_RESCORE_FACTOR``
+        candidates (at most 1000, pgvector's ef_search limit), which are then re-scored by
+        cosine distance on the halfvec column.
+        A ``collection`` restricts the scan to that collection's partial ANN index.
+        """
+        storage = storage or settings.EMBEDDING_STORAGE
+        if query_embedding is None:
+            query_embedding = self.generate_embedding(query)
+
+        if storage == "vector":
+            distance = DocumentChunk.embedding.cosine_distance(query_embedding)
+            stmt = select(DocumentChunk, distance.label("distance"))
+        elif storage == "halfvec":
+            distance = DocumentChunk.embedding_half.cosine_distance(query_embedding)
+            stmt = select(DocumentChunk, distance.label("distance"))
+        elif storage == "binary":
+            candidate_count = min(limit * settings.BINARY_RESCORE_FACTOR, HNSW_MAX_EF_SEARCH)
+            # An HNSW scan returns at most hnsw.ef_search rows (default 40); widen it for this
+            # transaction so the whole candidate pool reaches the re-scoring step
+            db.execute(text(f"SET LOCAL hnsw.ef_search = {max(HNSW_DEFAULT_EF_SEARCH, candidate_count)}"))
+            candidates = (
+                select(DocumentChunk.id)
+                .order_by(DocumentChunk.embedding_bits.hamming_distance(binary_quantize(query_embedding)))
+                .limit(candidate_count)
+            )
+            if collection is not None:
+                candidates = candidates.where(DocumentChunk.collection == collection)
+            distance = DocumentChunk.embedding_half.cosine_distance(query_embedding)
+            stmt = select(DocumentChunk, distance.label("distance")).where(DocumentChunk.id.in_(candidates))
+        else:
+            raise ValueError(f"Unknown embedding storage: {storage}")
         
-        chunks =  db.execute(stmt).scalars().all()
-        return chunks
+        if collection is not None:
+            stmt = stmt.where(DocumentChunk.collection == collection)
+        stmt = stmt.order_by(distance).limit(limit)
+        return [(chunk, float(dist)) for chunk, dist in db.execute(stmt).all()]
+    
+    def search_similar(
+        self, db: Session, query: str, limit: int = 3, collection: Optional[str] = None
+    ) -> List[DocumentChunk]:
+        return [chunk for chunk, _ in self.search_with_scores(db, query, limit, collection=collection)]
+
+    def ensure_collection_indexes(self, db: Session, collection: str) -> None:
+        """Create partial ANN indexes covering only this collection's chunks"""
+        validate_collection(collection)
+        for column, opclass in COLLECTION_INDEXES:
+            db.execute(text(
+                f"CREATE INDEX IF NOT EXISTS ix_document_chunks_{column}_{collection} "
+                f"ON document_chunks USING hnsw ({column} {opclass}) "
+                f"WHERE collection = '{collection}'"
+            ))
+        db.commit()
     
+    @staticmethod
     def return_content(chunks):
         return "\n\n".join([chunk.content for chunk in chunks])
     
@@ -0,0 +1,152 @@
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, Iterator, List
+import re
+
+BLOCK_SIZE = 64 * 1024  # characters read per block
+
+
+class TextExtractor:
+    """Yields the plain text of a file in bounded-size blocks"""
+    doc_type = "txt"
+
+    def extract(self, file_path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class PlainTextExtractor(TextExtractor):
+    doc_type = "txt"
+
+    def extract(self, file_path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    break
+                yield block
+
+
+class MarkdownExtractor(TextExtractor):
+    doc_type = "md"
+
+    _patterns = [
+        (re.compile(r"!\[([^\]]*)\]\([^)]*\)"), r"\1"),   # images
+        (re.compile(r"\[([^\]]*)\]\([^)]*\)"), r"\1"),    # links
+        (re.compile(r"^\s{0,3}#{1,6}\s*"), ""),           # headings
+        (re.compile(r"^\s{0,3}>\s?"), ""),                # blockquotes
+        (re.compile(r"^\s*([-*+]|\d+\.)\s+"), ""),        # list markers
+        # Emphasis only as paired delimiters at word boundaries, so OP_CHECKSIG or a * b survive
+        (re.compile(r"(?<![\w*])(\*{1,3})(?=\S)(.+?)(?<=\S)\1(?![\w*])"), r"\2"),
+        (re.compile(r"(?<![\w_])(_{1,3})(?=\S)(.+?)(?<=\S)\1(?![\w_])"), r"\2"),
+        (re.compile(r"`([^`]+)`"), r"\1"),                # inline code
+    ]
+    _fence = re.compile(r"^\s{0,3}(```|~~~)")
+
+    def _clean(self, line: str) -> str:
+        for pattern, repl in self._patterns:
+            line = pattern.sub(repl, line)
+        return line
+
+    def extract(self, file_path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+        lines: List[str] = []
+        size = 0
+        fence = None  # opening marker while inside a fenced code block
+        with open(file_path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                match = self._fence.match(line)
+                if match and fence in (None, match.group(1)):
+                    fence = None if fence else match.group(1)
+                    cleaned = "\n"
+                elif fence:
+                    cleaned = line  # code passes through untouched
+                else:
+                    cleaned = self._clean(line)
+                lines.append(cleaned)
+                size += len(cleaned)
+                if size >= block_size:
+                    yield "".join(lines)
+                    lines, size = [], 0
+        if lines:
+            yield "".join(lines)
+
+
+class _HTMLTextParser(HTMLParser):
+    _skip_tags = {"script", "style", "noscript", "head"}
+    _block_tags = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._skip_tags:
+            self.skip_depth += 1
+        elif tag in self._block_tags:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._skip_tags and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag in self._block_tags:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def drain(self) -> str:
+        text = "".join(self.parts)
+        self.parts = []
+        return text
+
+
+class HTMLExtractor(TextExtractor):
+    doc_type = "html"
+
+    def extract(self, file_path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+        parser = _HTMLTextParser()
+        for block in PlainTextExtractor().extract(file_path, block_size):
+            parser.feed(block)
+            text = parser.drain()
+            if text:
+                yield text
+        parser.close()
+        text = parser.drain()
+        if text:
+            yield text
+
+
+class PDFExtractor(TextExtractor):
+    doc_type = "pdf"
+
+    def extract(self, file_path: Path, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+        try:
+            from pypdf import PdfReader
+        except ImportError as e:
+            raise ImportError("PDF ingestion requires pypdf: pip install 'bitcoin-agent[pdf]'") from e
+
+        # Given a path, pypdf reads the whole file into memory; a file handle is read on demand
+        with open(file_path, "rb") as f:
+            reader = PdfReader(f)
+            for page in reader.pages:
+                text = page.extract_text() or ""
+                if text:
+                    yield text + "\n"
+
+
+EXTRACTORS: Dict[str, TextExtractor] = {
+    ".txt": PlainTextExtractor(),
+    ".md": MarkdownExtractor(),
+    ".markdown": MarkdownExtractor(),
+    ".html": HTMLExtractor(),
+    ".htm": HTMLExtractor(),
+    ".pdf": PDFExtractor(),
+}
+
+
+def get_extractor(file_path: Path) -> TextExtractor:
+    extractor = EXTRACTORS.get(file_path.suffix.lower())
+    if extractor is None:
+        raise ValueError(f"Unsupported document type: {file_path.suffix}")
+    return extractor
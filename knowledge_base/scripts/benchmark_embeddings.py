@@ -0,0 +1,89 @@
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+from sqlalchemy import select, text
+from bitcoin_agent.db.session import SessionLocal
+from bitcoin_agent.models.document import DocumentChunk
+from bitcoin_agent.services.vector_service import vector_service, EMBEDDING_STORAGES
+
+COLUMNS = {"vector": "embedding", "halfvec": "embedding_half", "binary": "embedding_bits"}
+INDEXES = {
+    "vector": "ix_document_chunks_embedding",
+    "halfvec": "ix_document_chunks_embedding_half",
+    "binary": "ix_document_chunks_embedding_bits",
+}
+
+def sample_queries(db, count: int) -> List[str]:
+    """Use the opening words of random chunks as queries"""
+    rows = db.execute(
+        select(DocumentChunk.content).order_by(DocumentChunk.id).limit(count * 7)
+    ).scalars().all()
+    return [" ".join(content.split()[:20]) for content in rows[::7]][:count]
+
+def exact_ids(db, query_embedding: List[float], k: int) -> List[int]:
+    """Ground truth: brute-force float32 cosine ranking with index scans disabled"""
+    db.execute(text("SET LOCAL enable_indexscan = off"))
+    ids = db.execute(
+        select(DocumentChunk.id)
+        .where(DocumentChunk.embedding.is_not(None))
+        .order_by(DocumentChunk.embedding.cosine_distance(query_embedding))
+        .limit(k)
+    ).scalars().all()
+    db.rollback()
+    return ids
+
+def storage_sizes(db) -> Dict[str, Dict[str, int]]:
+    sizes = {}
+    for storage, column in COLUMNS.items():
+        column_bytes = db.execute(text(
+            f"SELECT COALESCE(SUM(pg_column_size({column})), 0) FROM document_chunks"
+        )).scalar()
+        index_bytes = db.execute(text(
+            "SELECT COALESCE(pg_relation_size(to_regclass(:name)), 0)"
+        ), {"name": INDEXES[storage]}).scalar()
+        sizes[storage] = {"column_bytes": int(column_bytes), "index_bytes": int(index_bytes)}
+    sizes["table_total_bytes"] = int(db.execute(text(
+        "SELECT pg_total_relation_size('document_chunks')"
+    )).scalar())
+    return sizes
+
+def benchmark(queries: int = 50, k: int = 5, storages: List[str] = None) -> dict:
+    db = SessionLocal()
+    try:
+        texts = sample_queries(db, queries)
+        if not texts:
+            raise SystemExit("No chunks ingested; run ingest_docs.py first")
+        embeddings = vector_service.generate_embeddings(texts)
+        truth = [exact_ids(db, embedding, k) for embedding in embeddings]
+
+        report = {"queries": len(texts), "k": k, "sizes": storage_sizes(db), "storages": {}}
+        for storage in storages or EMBEDDING_STORAGES:
+            latencies, recalls = [], []
+            for query, embedding, expected in zip(texts, embeddings, truth):
+                start = time.perf_counter()
+                hits = vector_service.search_with_scores(db, query, k, query_embedding=embedding, storage=storage)
+                latencies.append((time.perf_counter() - start) * 1000)
+                found = {chunk.id for chunk, _ in hits}
+                recalls.append(len(found & set(expected)) / max(1, len(expected)))
+            latencies.sort()
+            report["storages"][storage] = {
+                f"recall@{k}": round(statistics.mean(recalls), 4),
+                "latency_ms_p50": round(latencies[len(latencies) // 2], 3),
+                "latency_ms_p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+                "latency_ms_mean": round(statistics.mean(latencies), 3),
+            }
+        return report
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare float32, halfvec and binary embedding layouts")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--storage", action="append", choices=EMBEDDING_STORAGES,
+                        help="layouts to benchmark (default: all)")
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.queries, args.k, args.storage), indent=2))
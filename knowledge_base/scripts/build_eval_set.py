@@ -0,0 +1,78 @@
+"""
+Bootstrap a labeled retrieval set (question -> expected passage) from a knowledge base document.
+
+Two kinds of items are produced:
+    section  - "What does the whitepaper say about <heading>?" -> opening sentence of that section
+    sentence - the first part of a prose sentence as the query -> the full sentence
+
+Labels are text spans rather than chunk ids, so the same set stays valid when chunking changes.
+
+Usage:
+    python knowledge_base/scripts/build_eval_set.py > knowledge_base/eval/whitepaper_qa.jsonl
+"""
+import argparse
+import json
+import re
+from pathlib import Path
+
+SECTION_RE = re.compile(r"^(\d+)\.\s+(\S.*?)\s*$")
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+def read_sections(text: str):
+    """(title, body) pairs for the numbered sections, stopping at the references"""
+    sections, title, body = [], None, []
+    for line in text.splitlines():
+        match = SECTION_RE.match(line)
+        if match or line.strip() == "References":
+            if title:
+                sections.append((title, normalize(" ".join(body))))
+            if not match:
+                break
+            title, body = match.group(2), []
+        elif title:
+            body.append(line)
+    return sections
+
+def prose_sentences(body: str, min_words: int, max_words: int):
+    for sentence in SENTENCE_SPLIT_RE.split(body):
+        words = sentence.split()
+        letters = sum(c.isalpha() for c in sentence)
+        if min_words <= len(words) <= max_words and letters > 0.7 * len(sentence.replace(" ", "")):
+            yield sentence
+
+def build_eval_set(doc_path: Path, every: int = 3, query_fraction: float = 0.6,
+                   min_words: int = 12, max_words: int = 60):
+    items = []
+    for title, body in read_sections(doc_path.read_text(encoding="utf-8-sig")):
+        sentences = list(prose_sentences(body, min_words, max_words))
+        if not sentences:
+            continue
+        items.append({
+            "kind": "section",
+            "question": f"What does the whitepaper say about {title.lower()}?",
+            "expected_spans": [sentences[0]],
+        })
+        for sentence in sentences[1::every]:
+            words = sentence.split()
+            items.append({
+                "kind": "sentence",
+                "question": " ".join(words[:max(6, int(len(words) * query_fraction))]),
+                "expected_spans": [sentence],
+            })
+
+    for number, item in enumerate(items, start=1):
+        item["id"] = f"{doc_path.stem}-{number:03d}"
+        item["document"] = doc_path.name
+    return items
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a retrieval evaluation set from a document")
+    parser.add_argument("--doc", default="./knowledge_base/bitcoin_docs/bitcoin_whitepaper.txt")
+    parser.add_argument("--every", type=int, default=3, help="take every Nth prose sentence per section")
+    args = parser.parse_args()
+
+    for item in build_eval_set(Path(args.doc), args.every):
+        print(json.dumps(item, ensure_ascii=False, sort_keys=True))
@@ -0,0 +1,183 @@
+"""
+Offline retrieval evaluation: recall@k, MRR, nDCG@k and per-query latency for search_similar.
+
+Every query runs in two modes against the ingested knowledge base:
+    exact - index scans disabled and every chunk ranked by cosine distance (ground-truth
+            ordering); with binary storage this uses the halfvec column rather than the
+            Hamming candidate scan, which would not be exact
+    ann   - the configured ANN index (EMBEDDING_STORAGE decides which one); also reports
+            overlap_with_exact, the share of the exact top-k the index returned
+
+A retrieved chunk is relevant when it contains the start or end of an expected span, which
+keeps labels valid across chunking changes. The JSON report is key-sorted so reports from
+two commits can be diffed directly.
+
+Usage:
+    python knowledge_base/scripts/eval_retrieval.py --output reports/retrieval.json
+"""
+import argparse
+import json
+import math
+import statistics
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import text
+
+from bitcoin_agent.config import settings
+from bitcoin_agent.db.session import SessionLocal
+from bitcoin_agent.services.chunking_service import DEFAULT_COLLECTION, get_chunking_config
+from bitcoin_agent.services.vector_service import vector_service
+
+SPAN_EDGE_WORDS = 12
+MODES = ("exact", "ann")
+
+def normalize(value: str) -> str:
+    return " ".join(value.lower().split())
+
+def load_eval_set(path: Path) -> List[Dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def span_edges(span: str) -> List[str]:
+    words = normalize(span).split()
+    return [" ".join(words[:SPAN_EDGE_WORDS]), " ".join(words[-SPAN_EDGE_WORDS:])]
+
+def relevance(contents: List[str], spans: List[str]) -> List[int]:
+    """Index of the expected span each retrieved chunk matches, or -1"""
+    edges = [span_edges(span) for span in spans]
+    matches = []
+    for content in contents:
+        content = normalize(content)
+        matches.append(next(
+            (i for i, (head, tail) in enumerate(edges) if head in content or tail in content), -1
+        ))
+    return matches
+
+def score_query(matches: List[int], expected: int, k: int) -> Dict[str, float]:
+    # Overlapping chunks can match the same span; only the first one earns gain
+    found, dcg = set(), 0.0
+    for rank, span in enumerate(matches[:k], start=1):
+        if span >= 0 and span not in found:
+            found.add(span)
+            dcg += 1 / math.log2(rank + 1)
+    first = next((rank for rank, span in enumerate(matches[:k], start=1) if span >= 0), None)
+    idcg = sum(1 / math.log2(rank + 1) for rank in range(1, min(expected, k) + 1))
+    return {
+        f"recall@{k}": len(found) / expected if expected else 0.0,
+        "mrr": 1 / first if first else 0.0,
+        f"ndcg@{k}": dcg / idcg if idcg else 0.0,
+    }
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(len(ordered) * fraction) - 1))]
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "mean_ms": round(statistics.mean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p90_ms": round(percentile(latencies, 0.90), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(max(latencies), 3),
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def exact_storage() -> str:
+    # Binary storage pre-selects candidates by Hamming distance; rank its halfvec copies instead
+    return "halfvec" if settings.EMBEDDING_STORAGE == "binary" else settings.EMBEDDING_STORAGE
+
+def run_query(db, question: str, embedding: List[float], k: int, mode: str, collection: str):
+    storage = None
+    if mode == "exact":
+        # SET LOCAL only lasts until the rollback below
+        db.execute(text("SET LOCAL enable_indexscan = off"))
+        storage = exact_storage()
+    start = time.perf_counter()
+    hits = vector_service.search_with_scores(
+        db, question, k, query_embedding=embedding, storage=storage, collection=collection
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    ids = [chunk.id for chunk, _ in hits]
+    contents = [chunk.content for chunk, _ in hits]
+    db.rollback()
+    return ids, contents, elapsed_ms
+
+def evaluate(eval_path: Path, k: int = 5, collection: str = DEFAULT_COLLECTION,
+             warmup: int = 3, per_query: bool = False) -> Dict:
+    items = load_eval_set(eval_path)
+    if not items:
+        raise SystemExit(f"No evaluation items in {eval_path}")
+    embeddings = vector_service.generate_embeddings([item["question"] for item in items])
+
+    db = SessionLocal()
+    try:
+        report = {
+            "commit": git_commit(),
+            "eval_set": str(eval_path),
+            "queries": len(items),
+            "config": {
+                "k": k,
+                "collection": collection,
+                "embedding_storage": settings.EMBEDDING_STORAGE,
+                "exact_storage": exact_storage(),
+                "chunking": vars(get_chunking_config(collection)),
+            },
+            "modes": {},
+        }
+        queries: Dict[str, Dict] = {item["id"]: {} for item in items}
+        exact_ids: Dict[str, List[int]] = {}
+        for mode in MODES:
+            for item, embedding in list(zip(items, embeddings))[:warmup]:
+                run_query(db, item["question"], embedding, k, mode, collection)
+
+            scores, latencies = [], []
+            for item, embedding in zip(items, embeddings):
+                ids, contents, elapsed_ms = run_query(db, item["question"], embedding, k, mode, collection)
+                matches = relevance(contents, item["expected_spans"])
+                score = score_query(matches, len(item["expected_spans"]), k)
+                if mode == "exact":
+                    exact_ids[item["id"]] = ids
+                else:
+                    # How much of the exact top-k the ANN index finds, independent of labels
+                    truth = exact_ids[item["id"]]
+                    score["overlap_with_exact"] = len(set(ids) & set(truth)) / len(truth) if truth else 1.0
+                scores.append(score)
+                latencies.append(elapsed_ms)
+                queries[item["id"]][mode] = {**score, "latency_ms": round(elapsed_ms, 3), "matches": matches}
+
+            report["modes"][mode] = {
+                **{metric: round(statistics.mean(s[metric] for s in scores), 4) for metric in scores[0]},
+                "latency": latency_summary(latencies),
+            }
+        if per_query:
+            report["per_query"] = queries
+        return report
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and latency")
+    parser.add_argument("--eval-set", default="./knowledge_base/eval/whitepaper_qa.jsonl")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--warmup", type=int, default=3, help="untimed queries per mode before measuring")
+    parser.add_argument("--per-query", action="store_true", help="include per-query scores and latencies")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    report = evaluate(Path(args.eval_set), args.k, args.collection, args.warmup, args.per_query)
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+        print(f"✓ Report written to {args.output}")
+    else:
+        print(output)
@@ -1,32 +1,68 @@
+import argparse
 from pathlib import Path
 from bitcoin_agent.services.vector_service import vector_service
+from bitcoin_agent.services.chunking_service import ChunkDeduplicator, DEFAULT_COLLECTION, get_chunking_config
+from bitcoin_agent.utils.extractors import EXTRACTORS, get_extractor
 from bitcoin_agent.db.session import SessionLocal
 
 def read_file(file_path: Path):
-    return file_path.read_text(encoding='utf-8')
+    return "".join(get_extractor(file_path).extract(file_path))
 
-def ingest_documents(docs_dir: str = "./knowledge_base/bitcoin_docs"):
+def ingest_documents(
+    docs_dir: str = "./knowledge_base/bitcoin_docs",
+    collection: str = DEFAULT_COLLECTION,
+    stream: bool = False,
+    batch_size: int = 64,
+):
     docs_path = Path(docs_dir)
     db = SessionLocal()
-    
-    for file_path in docs_path.glob("*"):
-        if file_path.suffix not in ['.txt']:
+
+    # One deduplicator for the whole run so boilerplate shared between files is stored once
+    deduplicator = ChunkDeduplicator(get_chunking_config(collection))
+    deduplicator.seed(db, collection)
+
+    for file_path in sorted(docs_path.glob("*")):
+        if file_path.suffix.lower() not in EXTRACTORS:
             continue
-        
+
         print(f"Processing {file_path.name}...")
-        content = read_file(file_path)
-        
-        doc = vector_service.add_document(
-            db=db,
-            title=file_path.name,
-            content=content,
-            file_path=str(file_path),
-            doc_type=file_path.suffix[1:]
-        )
-        
+        extractor = get_extractor(file_path)
+
+        if stream:
+            doc = vector_service.add_document_stream(
+                db=db,
+                title=file_path.name,
+                blocks=extractor.extract(file_path),
+                file_path=str(file_path),
+                doc_type=extractor.doc_type,
+                vector_collection=collection,
+                deduplicator=deduplicator,
+                batch_size=batch_size
+            )
+        else:
+            doc = vector_service.add_document(
+                db=db,
+                title=file_path.name,
+                content=read_file(file_path),
+                file_path=str(file_path),
+                doc_type=extractor.doc_type,
+                vector_collection=collection,
+                deduplicator=deduplicator
+            )
+
         print(f"✓ Ingested {doc.chunk_count} chunks from {file_path.name}")
-    
+
+    vector_service.ensure_collection_indexes(db, collection)
+    print(f"✓ ANN indexes ready for collection '{collection}'")
     db.close()
 
 if __name__ == "__main__":
-    ingest_documents()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Ingest documents into the vector store")
+    parser.add_argument("--docs-dir", default="./knowledge_base/bitcoin_docs")
+    parser.add_argument("--collection", default=DEFAULT_COLLECTION)
+    parser.add_argument("--stream", action="store_true",
+                        help="read files incrementally and commit chunks in rolling batches")
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    ingest_documents(args.docs_dir, args.collection, args.stream, args.batch_size)
@@ -0,0 +1,47 @@
+import argparse
+from sqlalchemy import text
+from bitcoin_agent.db.session import SessionLocal, engine
+
+def quantize_embeddings(drop_float: bool = False):
+    """Fill halfvec/bit columns from float32 (or halfvec) embeddings, optionally dropping the float32 copies"""
+    db = SessionLocal()
+    try:
+        result = db.execute(text(
+            "UPDATE document_chunks "
+            "SET embedding_half = embedding::halfvec(384), "
+            "embedding_bits = binary_quantize(embedding)::bit(384) "
+            "WHERE embedding IS NOT NULL AND (embedding_half IS NULL OR embedding_bits IS NULL)"
+        ))
+        print(f"✓ Quantized {result.rowcount} chunks")
+
+        # Chunks ingested under EMBEDDING_STORAGE=halfvec have no float32 copy to quantize from
+        result = db.execute(text(
+            "UPDATE document_chunks "
+            "SET embedding_bits = binary_quantize(embedding_half)::bit(384) "
+            "WHERE embedding IS NULL AND embedding_half IS NOT NULL AND embedding_bits IS NULL"
+        ))
+        print(f"✓ Quantized {result.rowcount} halfvec-only chunks")
+
+        if drop_float:
+            result = db.execute(text(
+                "UPDATE document_chunks SET embedding = NULL "
+                "WHERE embedding IS NOT NULL AND embedding_half IS NOT NULL"
+            ))
+            print(f"✓ Dropped float32 embeddings from {result.rowcount} chunks")
+        db.commit()
+    finally:
+        db.close()
+
+    if drop_float:
+        # Reclaim the space of the dropped vectors (VACUUM can't run inside a transaction)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM FULL ANALYZE document_chunks"))
+        print("✓ document_chunks compacted")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert stored embeddings to halfvec/binary layouts")
+    parser.add_argument("--drop-float", action="store_true",
+                        help="null out float32 embeddings once quantized (set EMBEDDING_STORAGE first)")
+    args = parser.parse_args()
+
+    quantize_embeddings(args.drop_float)